@@ -1,15 +1,48 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from PyPDF2 import PdfMerger
+import sys
 
 BASE_DIR = Path(__file__).parent
 INPUT_DIR = BASE_DIR / "pdfs"
 OUTPUT_DIR = BASE_DIR / "output"
 
+# Files read ahead by the prefetch threads
+PREFETCH_WORKERS = 4
 
-def merge_pdfs(output_name: str = "merged.pdf") -> None:
+
+def _prefetched_docs(pdf_files, workers: int = PREFETCH_WORKERS):
+    """
+    Yields (path, fitz.Document) in order, while up to `workers` of the
+    following files are being read from disk in background threads.
+    Only the raw reads run in threads; documents are opened on the calling
+    thread because PyMuPDF is not thread-safe.
+    """
+    import fitz  # PyMuPDF
+
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        pending = deque()
+        files = iter(pdf_files)
+        for pdf_path in files:
+            pending.append((pdf_path, ex.submit(pdf_path.read_bytes)))
+            if len(pending) >= workers:
+                break
+
+        while pending:
+            pdf_path, future = pending.popleft()
+            next_path = next(files, None)
+            if next_path is not None:
+                pending.append((next_path, ex.submit(next_path.read_bytes)))
+            yield pdf_path, fitz.open(stream=future.result(), filetype="pdf")
+
+
+def merge_pdfs(output_name: str = "merged.pdf", prefetch: bool = False) -> None:
     """
     Merge all PDFs in the INPUT_DIR folder into a single PDF
     saved in OUTPUT_DIR / output_name.
+    With prefetch=True, upcoming input files are read in background threads
+    while the current one is being merged (helps on slow or network storage,
+    can hurt on spinning disks).
     """
     pdf_files = sorted(INPUT_DIR.glob("*.pdf"))
 
@@ -18,23 +51,43 @@ def merge_pdfs(output_name: str = "merged.pdf") -> None:
         return
     OUTPUT_DIR.mkdir(exist_ok=True)
 
-    merger = PdfMerger()
+    # Imported here so importing this module (e.g. for its paths) stays cheap
+    import fitz  # PyMuPDF
+
+    merged = fitz.open()
 
     try:
         print("Merging PDFs in this order:")
-        for pdf_path in pdf_files:
+        if prefetch:
+            sources = _prefetched_docs(pdf_files)
+        else:
+            sources = ((pdf_path, fitz.open(pdf_path)) for pdf_path in pdf_files)
+
+        # insert_pdf doesn't carry bookmarks over, so collect them with shifted pages
+        toc = []
+        for pdf_path, src in sources:
+            with src:
+                offset = merged.page_count
+                toc.extend(
+                    [level, title, page + offset if page > 0 else page]
+                    for level, title, page in src.get_toc()
+                )
+                merged.insert_pdf(src)
             print(f"  - {pdf_path.name}")
-            merger.append(str(pdf_path))
+
+        if toc:
+            merged.set_toc(toc)
 
         output_path = OUTPUT_DIR / output_name
-        with output_path.open("wb") as f_out:
-            merger.write(f_out)
+        # garbage=3 merges duplicate objects (fonts, images) shared across inputs
+        merged.save(str(output_path), deflate=True, garbage=3)
 
         print(f"\nDone! Merged file saved as: {output_path}")
     finally:
-        merger.close()
+        merged.close()
 
 
 if __name__ == "__main__":
     # Change the output file name here if you want
-    merge_pdfs("8245AE-merged-lecture-notes.pdf")
+    # Pass --prefetch to read upcoming files in parallel while merging
+    merge_pdfs("8245AE-merged-lecture-notes.pdf", prefetch="--prefetch" in sys.argv[1:])
@@ -1,20 +1,32 @@
+import functools
+import itertools
+import multiprocessing
 import os
+import platform
+import re
+import shutil
+import subprocess
 import sys
 
-import pdfplumber
-import pyttsx3
-import platform
-from langdetect import detect, LangDetectException
+# Heavy dependencies (PyMuPDF, pyttsx3, langdetect, tkinter) are imported
+# inside the functions that use them, so importing this module stays cheap
+# and doesn't start a speech driver.
+
+# Documents detected with lower confidence fall back to per-page detection
+DOC_LANG_MIN_CONFIDENCE = 0.9
+
+# Speaking rate in words per minute for every TTS path (slightly slower than pyttsx3's 200)
+SPEECH_RATE = 180
 
-try:
-    # tkinter is usually included with Python; if this import fails,
-    # you can fall back to typing the path manually.
-    from tkinter import Tk, filedialog
-    TK_AVAILABLE = True
-except ImportError:
-    TK_AVAILABLE = False
+# Voices used when streaming to espeak-ng (other languages use "en")
+ESPEAK_NG_VOICES = {"en": "en", "fr": "fr"}
+
+# espeak-ng reads stdin with fgets into a 1000-byte buffer; keep lines below that
+ESPEAK_NG_MAX_LINE_BYTES = 900
 
 def init_tts_engine():
+    import pyttsx3
+
     system = platform.system()
     if system == "Windows":
         engine = pyttsx3.init("sapi5")
@@ -23,15 +35,16 @@ def init_tts_engine():
     else:
         engine = pyttsx3.init("espeak")
 
-    rate = engine.getProperty("rate")
-    engine.setProperty("rate", rate - 20)  # slightly slower
+    engine.setProperty("rate", SPEECH_RATE)
 
-    return engine
+    return engine, build_language_voice_map(engine)
 
+@functools.lru_cache(maxsize=1)
 def build_language_voice_map(engine):
     """
     Returns a dict like {"en": voice_id, "fr": voice_id}
     based on installed voices.
+    Cached per engine, since enumerating voices is slow on some drivers (SAPI).
     """
     voices = engine.getProperty("voices")
     lang_voice_map = {}
@@ -40,46 +53,75 @@ def build_language_voice_map(engine):
     for i, v in enumerate(voices):
         print(f"{i}: id={v.id}, name={getattr(v, 'name', '')}")
 
-    def voice_matches(v, keywords):
-        text = (v.id + " " + getattr(v, "name", "")).lower()
-        return any(k.lower() in text for k in keywords)
+    # Lower-case each voice's id + name once, instead of per keyword
+    voice_texts = [(v.id, (v.id + " " + getattr(v, "name", "")).lower()) for v in voices]
 
-    # Try to find English voice
-    for v in voices:
-        if voice_matches(v, ["en", "english"]):
-            lang_voice_map["en"] = v.id
-            break
-
-    # Try to find French voice
-    for v in voices:
-        if voice_matches(v, ["fr", "french", "français", "francais"]):
-            lang_voice_map["fr"] = v.id
-            break
+    language_keywords = {
+        "en": ["en", "english"],
+        "fr": ["fr", "french", "français", "francais"],
+    }
+    for lang, keywords in language_keywords.items():
+        for voice_id, text in voice_texts:
+            if any(k in text for k in keywords):
+                lang_voice_map[lang] = voice_id
+                break
 
     print("Language → voice map:", lang_voice_map)
     return lang_voice_map
 
+def _load_langdetect():
+    """
+    Imports langdetect on first use and makes it deterministic across runs.
+    """
+    import langdetect
+
+    langdetect.DetectorFactory.seed = 0
+    return langdetect
+
+
 def detect_language_of_text(text: str) -> str:
     """
     Detects the language code ('en', 'fr', etc.) of the given text.
     Returns 'unknown' on failure.
     """
+    langdetect = _load_langdetect()
     sample = text[:800]  # use first ~800 chars
     try:
-        lang = detect(sample)
+        lang = langdetect.detect(sample)
         print(f"Detected language: {lang}")
         return lang
-    except LangDetectException:
+    except langdetect.LangDetectException:
         print("Could not detect language, defaulting to 'unknown'")
         return "unknown"
 
 
+def detect_document_language(texts, sample_size: int = 2000) -> tuple[str, float]:
+    """
+    Detects the dominant language over the opening text of several pages.
+    Returns (language_code, probability), or ('unknown', 0.0) on failure.
+    """
+    langdetect = _load_langdetect()
+    sample = " ".join(texts)[:sample_size]
+    try:
+        best = langdetect.detect_langs(sample)[0]
+    except (langdetect.LangDetectException, IndexError):
+        print("Could not detect document language.")
+        return "unknown", 0.0
+
+    print(f"Detected document language: {best.lang} (p={best.prob:.2f})")
+    return best.lang, best.prob
+
+
 def choose_pdf_file() -> str | None:
     """
     Opens a file dialog to let the user choose a PDF.
     Returns the selected path, or None if nothing chosen.
     """
-    if not TK_AVAILABLE:
+    try:
+        # tkinter is usually included with Python; if this import fails,
+        # you can fall back to typing the path manually.
+        from tkinter import Tk, filedialog
+    except ImportError:
         # Fallback: ask for path in console
         pdf_path = input("Enter the full path to your PDF file: ").strip()
         return pdf_path if pdf_path else None
@@ -96,80 +138,273 @@ def choose_pdf_file() -> str | None:
     return file_path if file_path else None
 
 
-def extract_text_from_pdf(pdf_path: str):
+def _extract_page_range(args):
     """
-    Extracts and returns a list of (page_number, text) tuples
-    from the given PDF file.
+    Worker for extract_text_from_pdf: extracts the text of pages [start, stop).
+    Opens the document once per worker and returns a list of
+    (page_number, cleaned_text) tuples for pages that have text.
     """
-    all_pages_text = []
+    import fitz  # PyMuPDF
+
+    pdf_path, start, stop = args
+    pages_text = []
 
-    with pdfplumber.open(pdf_path) as pdf:
-        for i, page in enumerate(pdf.pages, start=1):
-            text = page.extract_text()
+    doc = fitz.open(pdf_path, filetype="pdf")
+    try:
+        for index in range(start, stop):
+            page_num = index + 1
+            page = doc[index]
+
+            # A page without fonts cannot contain text (typically a scanned image).
+            # Checking its resources avoids decompressing the image streams.
+            if not page.get_fonts():
+                print(f"[info] Page {page_num} has no fonts, skipping (maybe scanned).")
+                continue
+
+            # Text comes back pre-assembled from MuPDF; sort=True orders blocks
+            # top-left to bottom-right so multi-block layouts read naturally.
+            text = page.get_text("text", sort=True)
             if not text:
-                print(f"[info] Page {i} has no extractable text (maybe scanned).")
+                print(f"[info] Page {page_num} has no extractable text (maybe scanned).")
                 continue
 
             # Basic cleanup: collapse whitespace
             cleaned_text = " ".join(text.split())
             if cleaned_text.strip():
-                all_pages_text.append((i, cleaned_text))
+                pages_text.append((page_num, cleaned_text))
+    finally:
+        doc.close()
 
-    return all_pages_text
+    return pages_text
 
 
-def read_text_aloud(pages_text, start_page: int | None = None):
+def extract_text_from_pdf(pdf_path: str, num_workers: int = min(os.cpu_count() or 1, 4),
+                          pages_per_task: int = 8):
     """
-    Uses pyttsx3 to read the text of each page aloud.
-    Detects language (en/fr) and picks appropriate voice if available.
+    Yields (page_number, text) tuples from the given PDF file, in page order,
+    as soon as each page has been extracted.
+    Pages are split into small contiguous ranges parsed by worker processes,
+    so the first pages are available while later ones are still being parsed.
+
+    pdf_path must be a filesystem path, not the file's bytes or an io.BytesIO:
+    MuPDF then seeks in the file and only loads the objects it needs, so memory
+    stays flat no matter how large the PDF is.
     """
-    if not pages_text:
-        print("No text to read.")
+    import fitz  # PyMuPDF
+
+    pdf_path = os.fspath(pdf_path)  # TypeError for in-memory buffers
+    doc = fitz.open(pdf_path, filetype="pdf")
+    page_count = doc.page_count
+    doc.close()
+
+    ranges = [(pdf_path, start, min(start + pages_per_task, page_count))
+              for start in range(0, page_count, pages_per_task)]
+
+    if num_workers <= 1 or len(ranges) <= 1:
+        for page_range in ranges:
+            yield from _extract_page_range(page_range)
         return
 
-    engine = init_tts_engine()
-    lang_voice_map = build_language_voice_map(engine)
+    with multiprocessing.Pool(min(num_workers, len(ranges))) as pool:
+        for pages in pool.imap(_extract_page_range, ranges):
+            yield from pages
+
+
+def read_text_aloud(pages_iter, start_page: int | None = None, per_page_lang: bool = False,
+                    sample_pages: int = 5):
+    """
+    Uses pyttsx3 to read the text of each page aloud.
+    Detects language (en/fr) and picks appropriate voice if available.
+    Pages are consumed lazily, so speech starts as soon as the first page is ready.
+
+    The language is detected once from the first sample_pages pages; pages are
+    only detected individually when per_page_lang is set or that detection
+    is not confident enough.
+    """
+    engine, lang_voice_map = init_tts_engine()
 
     # Default language if detection fails
     default_lang = "en"
 
-    # Filter pages if a starting page was provided
-    if start_page is not None:
-        pages_text = [(num, text) for (num, text) in pages_text if num >= start_page]
-        if not pages_text:
-            print(f"No pages found starting from page {start_page}.")
-            return
+    # Skip pages before the requested starting page
+    if start_page:
+        pages_iter = ((num, text) for (num, text) in pages_iter if num >= start_page)
+
+    doc_lang = None
+    if not per_page_lang:
+        doc_lang, pages_iter = _peek_document_language(pages_iter, sample_pages)
 
-    for page_num, text in pages_text:
+    pages_read = 0
+    current_voice = None
+    lang_cache = {}  # hash of a page's opening text -> detected language
+    for page_num, text in pages_iter:
         print(f"\n--- Reading page {page_num} ---")
 
-        # Detect language of this page
-        lang = detect_language_of_text(text)
+        lang = doc_lang
+        if lang is None:
+            # Detect language of this page (repeated openings, e.g. running headers, hit the cache)
+            key = hash(text[:200])
+            lang = lang_cache.get(key)
+            if lang is None:
+                lang = lang_cache[key] = detect_language_of_text(text)
         if lang not in lang_voice_map:
             print(f"No dedicated voice for language '{lang}', using default.")
             lang = default_lang
 
-        # Set voice for this page (if we have one)
+        # Switch voice only when the language actually changes
         voice_id = lang_voice_map.get(lang)
-        if voice_id:
+        if voice_id and voice_id != current_voice:
             engine.setProperty("voice", voice_id)
+            current_voice = voice_id
             print(f"Using voice '{voice_id}' for language '{lang}'")
 
-        # Say page number in that language
-        if lang == "fr":
-            engine.say(f"Page {page_num}")
-        else:
-            engine.say(f"Page {page_num}")
-
-        engine.say(text)
+        # One utterance per page: page number followed by its text
+        engine.say(f"Page {page_num}. {text}")
         engine.runAndWait()
+        pages_read += 1
+
+    if not pages_read:
+        _print_nothing_read(start_page)
+        return
+
+    print("Finished reading all pages.")
+
+
+def read_text_aloud_stream(pages_iter, start_page: int | None = None, per_page_lang: bool = False,
+                           sample_pages: int = 5):
+    """
+    Reads the pages aloud through one long-lived espeak-ng process on Linux,
+    writing each page to its stdin as lines it speaks as they arrive.
+    The synthesizer speaks continuously instead of being restarted per page.
+    Falls back to read_text_aloud (pyttsx3) on other systems (macOS `say`
+    only starts speaking at EOF), when espeak-ng is missing, or when the
+    language must be detected per page.
+
+    Pages are queued faster than they are spoken, so unlike read_text_aloud
+    this does not print which page is currently being read.
+    """
+    if per_page_lang:
+        return read_text_aloud(pages_iter, start_page, per_page_lang=True)
+
+    if platform.system() != "Linux" or not shutil.which("espeak-ng"):
+        return read_text_aloud(pages_iter, start_page, sample_pages=sample_pages)
+
+    # Skip pages before the requested starting page
+    if start_page:
+        pages_iter = ((num, text) for (num, text) in pages_iter if num >= start_page)
+
+    pages_iter = iter(pages_iter)
+    first_page = next(pages_iter, None)
+    if first_page is None:
+        _print_nothing_read(start_page)
+        return
+    pages_iter = itertools.chain([first_page], pages_iter)
+
+    # One process means one voice: switching language mid-document needs pyttsx3
+    doc_lang, pages_iter = _peek_document_language(pages_iter, sample_pages)
+    if doc_lang is None:
+        return read_text_aloud(pages_iter, start_page, per_page_lang=True)
+
+    if doc_lang not in ESPEAK_NG_VOICES:
+        print(f"No dedicated voice for language '{doc_lang}', using default.")
+    voice = ESPEAK_NG_VOICES.get(doc_lang, ESPEAK_NG_VOICES["en"])
+    tts_command = ["espeak-ng", "-s", str(SPEECH_RATE), "-v", voice]
+    print(f"Streaming pages to: {' '.join(tts_command)}")
+    print("Pages are queued ahead of speech; progress is not shown per page.")
+
+    exited_early = False
+    proc = subprocess.Popen(tts_command, stdin=subprocess.PIPE, text=True, encoding="utf-8")
+    try:
+        for page_num, text in pages_iter:
+            for line in _split_tts_lines(f"Page {page_num}. {text}", ESPEAK_NG_MAX_LINE_BYTES):
+                proc.stdin.write(line + "\n")
+            proc.stdin.flush()
+        proc.stdin.close()
+        proc.wait()
+    except BrokenPipeError:
+        exited_early = True
+    finally:
+        if proc.poll() is None:
+            proc.terminate()
+            proc.wait()
+
+    if exited_early or proc.returncode != 0:
+        print(f"Speech process '{tts_command[0]}' stopped before reading everything "
+              f"(exit code {proc.returncode}).")
+        return
 
     print("Finished reading all pages.")
 
+
+def _split_tts_lines(text: str, max_bytes: int):
+    """
+    Splits text into lines of at most max_bytes UTF-8 bytes, breaking after
+    sentences where possible, otherwise at whitespace.
+    """
+    def size(s):
+        return len(s.encode("utf-8"))
+
+    # Sentences, with any sentence that is too long on its own cut into words
+    pieces = []
+    for sentence in re.split(r"(?<=[.!?])\s+", text):
+        if size(sentence) <= max_bytes:
+            pieces.append(sentence)
+        else:
+            pieces.extend(sentence.split())
+
+    lines = []
+    current = ""
+    for piece in pieces:
+        candidate = f"{current} {piece}" if current else piece
+        if size(candidate) <= max_bytes:
+            current = candidate
+            continue
+        if current:
+            lines.append(current)
+        # A single word longer than a line: cut it on character boundaries
+        while size(piece) > max_bytes:
+            cut = len(piece.encode("utf-8")[:max_bytes].decode("utf-8", "ignore"))
+            lines.append(piece[:cut])
+            piece = piece[cut:]
+        current = piece
+    if current:
+        lines.append(current)
+    return lines
+
+
+def _peek_document_language(pages_iter, sample_pages: int):
+    """
+    Detects the document language from the first sample_pages pages.
+    Returns (language or None if not confident, iterator over all the pages).
+    """
+    # Peek at the first few pages, then put them back in front of the rest
+    pages_iter = iter(pages_iter)
+    head = list(itertools.islice(pages_iter, sample_pages))
+    pages_iter = itertools.chain(head, pages_iter)
+    if not head:
+        return None, pages_iter
+
+    lang, prob = detect_document_language(text for _, text in head)
+    if prob < DOC_LANG_MIN_CONFIDENCE:
+        print("Low confidence, detecting language per page.")
+        return None, pages_iter
+    return lang, pages_iter
+
+
+def _print_nothing_read(start_page: int | None):
+    if start_page:
+        print(f"No pages with text found starting from page {start_page}.")
+    else:
+        print("No readable text found in this PDF. It might be scanned images.")
+
 def main():
     # 1. Get PDF path either from command line or file chooser
-    if len(sys.argv) >= 2:
-        pdf_path = sys.argv[1]
+    args = sys.argv[1:]
+    per_page_lang = "--per-page-lang" in args
+    args = [a for a in args if a != "--per-page-lang"]
+
+    if args:
+        pdf_path = args[0]
     else:
         print("No PDF path provided as an argument. Opening file chooser...")
         pdf_path = choose_pdf_file()
@@ -188,16 +423,19 @@ def main():
 
     print(f"Using PDF: {pdf_path}")
 
-    # 2. Extract text
-    print("Extracting text from PDF...")
-    pages_text = extract_text_from_pdf(pdf_path)
+    # 2. Count pages (text is extracted lazily while reading)
+    import fitz  # PyMuPDF
 
-    if not pages_text:
-        print("No readable text found in this PDF. It might be scanned images.")
+    doc = fitz.open(pdf_path, filetype="pdf")
+    page_count = doc.page_count
+    doc.close()
+
+    if not page_count:
+        print("This PDF has no pages.")
         return
 
     # 3. Ask user which page to start from (optional)
-    print(f"The PDF has {len(pages_text)} pages with extractable text.")
+    print(f"The PDF has {page_count} pages.")
     start_page_input = input(
         "Enter a page number to start from (or press Enter to start at the beginning): "
     ).strip()
@@ -212,7 +450,8 @@ def main():
 
     # 4. Read aloud
     print("Starting text-to-speech...")
-    read_text_aloud(pages_text, start_page=start_page)
+    read_text_aloud_stream(extract_text_from_pdf(pdf_path), start_page=start_page,
+                           per_page_lang=per_page_lang)
     print("Done.")
 
 
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
 import time
@@ -7,7 +8,60 @@ import tkinter as tk
 from tkinter import filedialog, simpledialog, messagebox
 
 import fitz  # PyMuPDF
-from PIL import Image, ImageTk
+import numpy as np
+
+# Rendered page cache limits (LRU on (page_index, zoom, grayscale))
+PIX_CACHE_MAX_ENTRIES = 8
+PIX_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Initial capacity of the stroke point buffer (doubled when full)
+STROKE_BUFFER_CHUNK = 256
+
+# Drag samples closer than this (L1 distance, canvas px) or interval (ms) are dropped
+STROKE_MIN_DISTANCE = 2.0
+STROKE_MIN_INTERVAL_MS = 8
+
+# Max deviation (canvas px) allowed when simplifying a stroke before saving it
+STROKE_SIMPLIFY_EPSILON = 0.75
+
+
+def _rdp(points: np.ndarray, eps: float = STROKE_SIMPLIFY_EPSILON) -> np.ndarray:
+    """
+    Simplifies a polyline (N x 2 array) with the Ramer-Douglas-Peucker algorithm.
+    Keeps the end points and every point deviating more than eps from the
+    simplified line. Iterative, so long strokes cannot hit the recursion limit.
+    """
+    n = len(points)
+    if n < 3:
+        return points
+
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+
+        a = points[start].astype(np.float64)
+        ab = points[end] - a
+        ap = points[start + 1:end] - a
+        norm = np.hypot(ab[0], ab[1])
+        if norm == 0:
+            # Closed segment: fall back to distance from the start point
+            dist = np.hypot(ap[:, 0], ap[:, 1])
+        else:
+            # Perpendicular distance via the 2D cross product
+            dist = np.abs(ab[0] * ap[:, 1] - ab[1] * ap[:, 0]) / norm
+
+        i = int(np.argmax(dist))
+        if dist[i] > eps:
+            split = start + 1 + i
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+
+    return points[keep]
 
 
 @dataclass
@@ -16,6 +70,7 @@ class ViewState:
     page_index: int = 0
     tool: str = "draw"  # draw | highlight | text
     draw_width: float = 2.0
+    grayscale: bool = False  # render the preview as 8-bit gray instead of RGB
 
 
 class PdfAnnotatorApp(tk.Tk):
@@ -37,16 +92,22 @@ class PdfAnnotatorApp(tk.Tk):
 
         self.state = ViewState()
         self.doc: fitz.Document | None = None
+        self._current_page: fitz.Page | None = None  # page shown on the canvas
         self.pdf_path: Path | None = None
 
         self._tk_img = None  # keep reference
         self._page_pixmap = None
+        self._pix_cache: OrderedDict[tuple[int, float, bool], fitz.Pixmap] = OrderedDict()
+        self._pix_cache_bytes = 0
 
         # For interactions
         self._drag_start = None  # (x,y)
         self._current_highlight_rect_id = None
         self._last_draw_point = None
-        self._current_stroke_points = []  # stores (x, y) canvas points
+        self._last_sample_time = 0  # Tk event time (ms) of the last kept stroke point
+        self._current_stroke_points = np.empty((STROKE_BUFFER_CHUNK, 2), dtype=np.float32)
+        self._stroke_len = 0  # number of (x, y) canvas points in the buffer
+        self._stroke_line_id = None  # single polyline previewing the stroke
 
         self._build_ui()
 
@@ -73,6 +134,10 @@ class PdfAnnotatorApp(tk.Tk):
         tk.Spinbox(top, from_=0.5, to=4.0, increment=0.1, textvariable=self.zoom_var,
                    width=5, command=self._apply_zoom).pack(side=tk.LEFT)
 
+        self.grayscale_var = tk.BooleanVar(value=self.state.grayscale)
+        tk.Checkbutton(top, text="Grayscale preview", variable=self.grayscale_var,
+                       command=self._set_grayscale).pack(side=tk.LEFT, padx=(15, 5))
+
         self.page_label = tk.Label(top, text="Page: - / -")
         self.page_label.pack(side=tk.RIGHT, padx=10)
 
@@ -118,6 +183,8 @@ class PdfAnnotatorApp(tk.Tk):
 
         self.pdf_path = Path(file_path)
         self.state.page_index = 0
+        self._current_page = None
+        self._clear_pix_cache()
         self._render_page()
 
     def _render_page(self):
@@ -126,15 +193,17 @@ class PdfAnnotatorApp(tk.Tk):
 
         page_count = self.doc.page_count
         self.state.page_index = max(0, min(self.state.page_index, page_count - 1))
-        page = self.doc[self.state.page_index]
+        # Load the page object only when the displayed page changes
+        page = self._current_page
+        if page is None or page.number != self.state.page_index:
+            page = self._current_page = self.doc[self.state.page_index]
 
         self.state.zoom = float(self.zoom_var.get())
-        mat = fitz.Matrix(self.state.zoom, self.state.zoom)
-        pix = page.get_pixmap(matrix=mat, alpha=False)
+        pix = self._get_page_pixmap(page)
 
         self._page_pixmap = pix
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        self._tk_img = ImageTk.PhotoImage(img)
+        # Tk reads PPM/PGM natively, so no intermediate PIL image copy is needed
+        self._tk_img = tk.PhotoImage(data=pix.tobytes("pgm" if pix.n == 1 else "ppm"))
 
         self.canvas.delete("all")
         self.canvas.create_image(0, 0, anchor="nw", image=self._tk_img, tags="PAGE")
@@ -142,6 +211,45 @@ class PdfAnnotatorApp(tk.Tk):
 
         self.page_label.config(text=f"Page: {self.state.page_index + 1} / {page_count}")
 
+    # ---------------- Render cache ----------------
+
+    def _get_page_pixmap(self, page: fitz.Page) -> fitz.Pixmap:
+        """
+        Returns the rasterized page for the current zoom and color mode, reusing
+        a cached pixmap when the page has not changed since it was last rendered.
+        """
+        key = (self.state.page_index, round(self.state.zoom, 2), self.state.grayscale)
+        pix = self._pix_cache.get(key)
+        if pix is not None:
+            self._pix_cache.move_to_end(key)
+            return pix
+
+        mat = fitz.Matrix(self.state.zoom, self.state.zoom)
+        colorspace = fitz.csGRAY if self.state.grayscale else fitz.csRGB
+        pix = page.get_pixmap(matrix=mat, colorspace=colorspace, alpha=False)
+
+        self._pix_cache[key] = pix
+        self._pix_cache_bytes += pix.width * pix.height * pix.n
+        while len(self._pix_cache) > 1 and (
+            len(self._pix_cache) > PIX_CACHE_MAX_ENTRIES
+            or self._pix_cache_bytes > PIX_CACHE_MAX_BYTES
+        ):
+            _, old = self._pix_cache.popitem(last=False)
+            self._pix_cache_bytes -= old.width * old.height * old.n
+        return pix
+
+    def _invalidate_page_cache(self, page_index: int):
+        """
+        Drops cached renders of one page (at every zoom/color mode) after it was annotated.
+        """
+        for key in [k for k in self._pix_cache if k[0] == page_index]:
+            old = self._pix_cache.pop(key)
+            self._pix_cache_bytes -= old.width * old.height * old.n
+
+    def _clear_pix_cache(self):
+        self._pix_cache.clear()
+        self._pix_cache_bytes = 0
+
     # ---------------- Navigation ----------------
 
     def prev_page(self):
@@ -149,12 +257,23 @@ class PdfAnnotatorApp(tk.Tk):
             return
         self.state.page_index -= 1
         self._render_page()
+        self._trim_fitz_store()
 
     def next_page(self):
         if not self.doc:
             return
         self.state.page_index += 1
         self._render_page()
+        self._trim_fitz_store()
+
+    def _trim_fitz_store(self):
+        """
+        Keeps MuPDF's object store bounded on image-heavy (scanned) PDFs,
+        where decoded images would otherwise pile up page after page.
+        The shown page is already rasterized (and cached), so emptying the
+        store on each page change only costs re-decoding on the next render.
+        """
+        fitz.TOOLS.store_shrink(100)
 
     # ---------------- Tool control ----------------
 
@@ -165,6 +284,11 @@ class PdfAnnotatorApp(tk.Tk):
         if self.doc:
             self._render_page()
 
+    def _set_grayscale(self):
+        self.state.grayscale = self.grayscale_var.get()
+        if self.doc:
+            self._render_page()
+
     # ---------------- Coordinate mapping ----------------
 
     def _canvas_to_pdf(self, x: float, y: float) -> tuple[float, float]:
@@ -186,8 +310,18 @@ class PdfAnnotatorApp(tk.Tk):
 
         tool = self.state.tool
         if tool == "draw":
-            self._current_stroke_points = [(x, y)]
+            self._stroke_len = 0
+            self._append_stroke_point(x, y)
             self._last_draw_point = (x, y)
+            self._last_sample_time = event.time
+            self._stroke_line_id = self.canvas.create_line(
+                x, y, x, y,
+                fill="red",
+                width=2,
+                capstyle=tk.ROUND,
+                smooth=True,
+                tags="INK_TMP"
+            )
 
         elif tool == "highlight":
             self._drag_start = (x, y)
@@ -214,17 +348,19 @@ class PdfAnnotatorApp(tk.Tk):
 
         tool = self.state.tool
         if tool == "draw" and self._last_draw_point is not None:
+            # Drop samples that barely moved or arrived too soon after the last one
             x0, y0 = self._last_draw_point
-            self.canvas.create_line(
-                x0, y0, x, y,
-                fill="red",
-                width=2,
-                capstyle=tk.ROUND,
-                smooth=True,
-                tags="INK_TMP"
-            )
+            if abs(x - x0) + abs(y - y0) < STROKE_MIN_DISTANCE:
+                return
+            if event.time - self._last_sample_time < STROKE_MIN_INTERVAL_MS:
+                return
+
             self._last_draw_point = (x, y)
-            self._current_stroke_points.append((x, y))
+            self._last_sample_time = event.time
+            self._append_stroke_point(x, y)
+            # Extend the one preview polyline rather than adding an item per segment
+            points = self._current_stroke_points[:self._stroke_len]
+            self.canvas.coords(self._stroke_line_id, *points.ravel().tolist())
 
         elif tool == "highlight" and self._drag_start and self._current_highlight_rect_id:
             x0, y0 = self._drag_start
@@ -239,6 +375,9 @@ class PdfAnnotatorApp(tk.Tk):
 
         tool = self.state.tool
         if tool == "draw":
+            # Keep the release point so throttling never cuts the stroke short
+            if self._last_draw_point is not None and self._last_draw_point != (x, y):
+                self._append_stroke_point(x, y)
             self._finalize_draw_stroke()
             self._last_draw_point = None
             self._render_page()
@@ -261,7 +400,7 @@ class PdfAnnotatorApp(tk.Tk):
     def _add_highlight_rect(self, x0, y0, x1, y1):
         if not self.doc:
             return
-        page = self.doc[self.state.page_index]
+        page = self._current_page
 
         # Normalize rectangle
         left, right = sorted([x0, x1])
@@ -274,6 +413,7 @@ class PdfAnnotatorApp(tk.Tk):
         rect = fitz.Rect(px0, py0, px1, py1)
         annot = page.add_highlight_annot(rect)
         annot.update()
+        self._invalidate_page_cache(self.state.page_index)
 
     def _add_text_at_canvas_point(self, x, y, text: str):
         """
@@ -282,7 +422,7 @@ class PdfAnnotatorApp(tk.Tk):
         if not self.doc:
             return
 
-        page = self.doc[self.state.page_index]
+        page = self._current_page
         px, py = self._canvas_to_pdf(x, y)
 
         # Define a rectangle where the text will appear.
@@ -301,38 +441,53 @@ class PdfAnnotatorApp(tk.Tk):
         # Optional: make it look like plain text (no border/fill)
         annot.set_colors(stroke=None, fill=None)  # no border, no background
         annot.update()
+        self._invalidate_page_cache(self.state.page_index)
 
     def _add_note_at_canvas_point(self, x, y, text: str):
         if not self.doc:
             return
-        page = self.doc[self.state.page_index]
+        page = self._current_page
         px, py = self._canvas_to_pdf(x, y)
 
         annot = page.add_text_annot((px, py), text)
         annot.update()
+        self._invalidate_page_cache(self.state.page_index)
 
     def _finalize_draw_stroke(self):
         """
         Convert the collected stroke points into ONE ink annotation.
         """
-        if not self.doc or len(self._current_stroke_points) < 2:
+        if not self.doc or self._stroke_len < 2:
             return
 
-        page = self.doc[self.state.page_index]
+        page = self._current_page
 
-        # Convert canvas points -> PDF points
-        stroke_pdf_points = [
-            self._canvas_to_pdf(x, y) for (x, y) in self._current_stroke_points
-        ]
+        # Drop points that don't change the stroke's shape, then
+        # convert canvas points -> PDF points (see _canvas_to_pdf) in one vector op
+        points = _rdp(self._current_stroke_points[:self._stroke_len])
+        stroke_pdf_points = [tuple(p) for p in (points / self.state.zoom).tolist()]
 
         # Ink annotation expects a list of strokes
         annot = page.add_ink_annot([stroke_pdf_points])
         annot.set_border(width=self.state.draw_width)
         annot.update()
+        self._invalidate_page_cache(self.state.page_index)
 
         # Cleanup
         self.canvas.delete("INK_TMP")
-        self._current_stroke_points = []
+        self._stroke_line_id = None
+        self._stroke_len = 0
+
+    def _append_stroke_point(self, x: float, y: float):
+        """
+        Appends a canvas point to the stroke buffer, growing it when full.
+        """
+        if self._stroke_len == len(self._current_stroke_points):
+            grown = np.empty((2 * len(self._current_stroke_points), 2), dtype=np.float32)
+            grown[:self._stroke_len] = self._current_stroke_points
+            self._current_stroke_points = grown
+        self._current_stroke_points[self._stroke_len] = (x, y)
+        self._stroke_len += 1
 
     # ---------------- Saving ----------------
 